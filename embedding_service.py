@@ -0,0 +1,202 @@
+import os
+import pickle
+import queue
+import secrets
+import stat
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import faiss
+import numpy as np
+
+# "local" loads the model and index inside every Streamlit process,
+# "service" sends queries to the shared embedding/search service instead
+SEARCH_BACKEND = os.environ.get("SO_HUB_SEARCH_BACKEND", "local")
+
+# The socket and its authkey live in a private 0700 directory, by default
+# under $XDG_RUNTIME_DIR or else next to the app
+_RUNTIME_DIR = os.environ.get("XDG_RUNTIME_DIR") or os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.environ.get("SO_HUB_SERVICE_DIR", os.path.join(_RUNTIME_DIR, "so_hub_service"))
+SOCKET_PATH = os.environ.get("SO_HUB_SERVICE_SOCKET", os.path.join(SERVICE_DIR, "search.sock"))
+AUTHKEY_FILE = os.path.join(SERVICE_DIR, "authkey")
+MAX_BATCH_SIZE = 64
+BATCH_WINDOW_SECONDS = 0.005
+LISTEN_BACKLOG = 128
+MAX_IDLE_CONNECTIONS = 16
+
+
+def ensure_private_dir(path):
+    """Creates a 0700 directory, refusing one that other users could write to."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by the current user with mode 0700")
+
+
+def load_authkey(create=False):
+    """Reads the shared authkey from SO_HUB_SERVICE_AUTHKEY or the 0600 secret file."""
+    authkey = os.environ.get("SO_HUB_SERVICE_AUTHKEY")
+    if authkey:
+        return authkey.encode()
+    if create and not os.path.exists(AUTHKEY_FILE):
+        ensure_private_dir(SERVICE_DIR)
+        fd = os.open(AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(secrets.token_hex(32).encode())
+    with open(AUTHKEY_FILE, "rb") as f:
+        return f.read().strip()
+
+
+class EmbeddingService:
+    """Encodes and searches queries from all sessions in micro-batches.
+
+    One connection thread per client forwards requests to a shared queue;
+    a single batching thread drains the queue and runs one encode() and one
+    index.search() call per batch, so the host only holds one model copy.
+    """
+
+    def __init__(self, model, index, max_batch_size=MAX_BATCH_SIZE, batch_window=BATCH_WINDOW_SECONDS):
+        self.model = model
+        self.index = index
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.requests = queue.Queue()
+
+    def serve_forever(self, socket_path=SOCKET_PATH):
+        ensure_private_dir(os.path.dirname(socket_path))
+        authkey = load_authkey(create=True)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        listener = Listener(socket_path, family="AF_UNIX", backlog=LISTEN_BACKLOG, authkey=authkey)
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        print(f"Embedding service listening on {socket_path}")
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError):
+                # A client that fails the handshake must not stop the service
+                continue
+            threading.Thread(target=self._handle_connection, args=(conn,), daemon=True).start()
+
+    def _handle_connection(self, conn):
+        reply = queue.Queue(maxsize=1)
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError, pickle.UnpicklingError):
+                    return
+                try:
+                    query, k = request["query"], int(request["k"])
+                    if not isinstance(query, str) or k <= 0:
+                        raise ValueError("expected a string query and a positive k")
+                except (KeyError, TypeError, ValueError) as e:
+                    response = {"error": f"Malformed request: {e}"}
+                else:
+                    self.requests.put((query, k, reply))
+                    response = reply.get()
+                try:
+                    conn.send(response)
+                except OSError:
+                    # The client went away before its reply was ready
+                    return
+
+    def _batch_loop(self):
+        while True:
+            batch = [self.requests.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        try:
+            embeddings = self.model.encode([query for query, _, _ in batch])
+            faiss.normalize_L2(embeddings)
+            # The largest k serves every request; smaller ones take a prefix
+            search_k = max(k for _, k, _ in batch)
+            distances, indices = self.index.search(embeddings.astype(np.float32), search_k)
+        except Exception as e:
+            for _, _, reply in batch:
+                reply.put({"error": str(e)})
+            return
+        for row, (_, k, reply) in enumerate(batch):
+            reply.put({"distances": distances[row : row + 1, :k], "indices": indices[row : row + 1, :k]})
+
+
+class EmbeddingClient:
+    """A thin client for the embedding service, safe to share between sessions.
+
+    Connections are not thread-safe, and Streamlit runs every rerun on a new
+    thread, so each search() borrows a connection from a lock-protected pool
+    and returns it afterwards.
+    """
+
+    def __init__(self, socket_path=SOCKET_PATH, authkey=None):
+        self.socket_path = socket_path
+        self.configured_authkey = authkey
+        self.authkey = authkey
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        if self.authkey is None:
+            self.authkey = load_authkey()
+        return Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < MAX_IDLE_CONNECTIONS:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def _discard_idle(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def search(self, processed_query, k):
+        """Returns (distances, indices) for one preprocessed query, like index.search()."""
+        request = {"query": processed_query, "k": k}
+        # One retry on a fresh connection recovers from a restarted service
+        for attempt in range(2):
+            conn = None
+            try:
+                conn = self._acquire()
+                conn.send(request)
+                reply = conn.recv()
+            except (EOFError, OSError, AuthenticationError) as e:
+                if conn is not None:
+                    conn.close()
+                self._discard_idle()
+                self.authkey = self.configured_authkey
+                error = e
+                continue
+            self._release(conn)
+            break
+        else:
+            raise ConnectionError(f"Embedding service unavailable at {self.socket_path}: {error}")
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply["distances"], reply["indices"]
+
+
+if __name__ == "__main__":
+    from onnx_encoder import load_encoder
+    from quantized_index import load_search_index
+
+    service = EmbeddingService(load_encoder(), load_search_index())
+    service.serve_forever()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+ONNX_MODEL_DIR = "onnx_model"
+ONNX_MODEL_FILE = os.path.join(ONNX_MODEL_DIR, "model.onnx")
+QUANTIZED_MODEL_FILE = os.path.join(ONNX_MODEL_DIR, "model_int8.onnx")
+ENCODER_CONFIG_FILE = os.path.join(ONNX_MODEL_DIR, "encoder_config.json")
+
+# "torch" uses SentenceTransformer, "onnx" uses the exported int8 model
+ENCODER_BACKEND = os.environ.get("SO_HUB_ENCODER_BACKEND", "torch")
+
+
+def export_onnx_model():
+    """Exports the cached MiniLM weights to ONNX and quantizes them to int8.
+
+    Only the locally cached model is used, so this never touches the network.
+    """
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize
+
+    st_model = SentenceTransformer(MODEL_NAME)
+    transformer = st_model[0].auto_model.eval()
+    os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+    st_model.tokenizer.save_pretrained(ONNX_MODEL_DIR)
+
+    dummy = st_model.tokenizer(["export"], return_tensors="pt")
+    torch.onnx.export(
+        transformer,
+        (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+        ONNX_MODEL_FILE,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14,
+        # The TorchScript exporter honours dynamic_axes and needs no onnxscript
+        dynamo=False,
+    )
+    # Per-channel, 7-bit weights avoid the U8S8 saturation issue on AVX2/AVX512 CPUs
+    quantize_dynamic(
+        ONNX_MODEL_FILE,
+        QUANTIZED_MODEL_FILE,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        reduce_range=True,
+    )
+
+    # Mirror the SentenceTransformer pipeline: mean pooling, then optional L2 normalization
+    config = {
+        "max_seq_length": st_model.max_seq_length,
+        "normalize": any(isinstance(module, Normalize) for module in st_model),
+    }
+    with open(ENCODER_CONFIG_FILE, "w") as f:
+        json.dump(config, f)
+
+
+class OnnxEncoder:
+    """Runs the int8-quantized MiniLM through ONNX Runtime.
+
+    Provides the same encode() call as SentenceTransformer, with identical
+    tokenization and mean pooling, without importing torch.
+    """
+
+    def __init__(self, model_file=QUANTIZED_MODEL_FILE):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(ENCODER_CONFIG_FILE) as f:
+            config = json.load(f)
+        self.normalize = config["normalize"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(ONNX_MODEL_DIR, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=config["max_seq_length"])
+        self.tokenizer.enable_padding()
+        self.session = ort.InferenceSession(model_file, providers=["CPUExecutionProvider"])
+
+    def encode(self, sentences, batch_size=32):
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(sentences[start : start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            token_type_ids = np.array([e.type_ids for e in encodings], dtype=np.int64)
+            (hidden,) = self.session.run(
+                ["last_hidden_state"],
+                {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": token_type_ids},
+            )
+            mask = attention_mask[:, :, None].astype(np.float32)
+            embeddings = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+            batches.append(embeddings.astype(np.float32))
+        return np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+
+def load_encoder(backend=ENCODER_BACKEND):
+    """Loads the query encoder selected by SO_HUB_ENCODER_BACKEND."""
+    if backend == "onnx":
+        return OnnxEncoder()
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(MODEL_NAME)
+
+
+def load_titles(limit=None):
+    import pandas as pd
+
+    titles = pd.read_parquet("processed_data.parquet", columns=["Title"])["Title"]
+    return titles.fillna("").astype(str).tolist()[:limit]
+
+
+def check_parity(min_cosine=0.98):
+    """Checks that the ONNX encoder agrees with the torch encoder over the corpus titles."""
+    titles = load_titles()
+    reference = load_encoder("torch").encode(titles, batch_size=64)
+    candidate = load_encoder("onnx").encode(titles, batch_size=64)
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate /= np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosines = (reference * candidate).sum(axis=1)
+    print(f"titles: {len(titles)}  mean cosine: {cosines.mean():.4f}  min cosine: {cosines.min():.4f}")
+    return bool(cosines.min() >= min_cosine)
+
+
+def benchmark(num_queries=500):
+    """Measures cold start and per-query latency of both encoder backends."""
+    titles = load_titles(num_queries)
+    print(f"{'backend':<8}{'startup s':>11}{'ms/query':>10}")
+    for backend in ["torch", "onnx"]:
+        # Cold start runs in a fresh interpreter so imports are not already cached
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", f"import onnx_encoder; onnx_encoder.load_encoder('{backend}').encode(['warmup'])"],
+            check=True,
+        )
+        startup = time.perf_counter() - start
+
+        encoder = load_encoder(backend)
+        encoder.encode(["warmup"])
+        start = time.perf_counter()
+        for title in titles:
+            encoder.encode([title])
+        latency_ms = (time.perf_counter() - start) / len(titles) * 1000
+        print(f"{backend:<8}{startup:>11.2f}{latency_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export, check or benchmark the ONNX query encoder.")
+    parser.add_argument("command", choices=["export", "check", "benchmark"])
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx_model()
+    elif args.command == "check":
+        sys.exit(0 if check_parity() else 1)
+    else:
+        benchmark()
@@ -5,7 +5,6 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
 import re
 from bs4 import BeautifulSoup
 import nltk
@@ -13,6 +12,10 @@ from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import requests
 from db_functions import save_user_data
+from search_cache import SearchResultCache, get_index_version, make_cache_key
+from quantized_index import load_search_index
+from embedding_service import SEARCH_BACKEND, EmbeddingClient
+from onnx_encoder import load_encoder
 # --- 1. IMPORT THE DOWNLOADER ---
 from deployment_setup import download_files_if_needed
 
@@ -28,13 +31,21 @@ if not st.session_state.get("user_id"):
 
 # Caching & Loading
 @st.cache_resource
-def load_model(): return SentenceTransformer('all-MiniLM-L6-v2')
+def load_model(): return load_encoder()
 @st.cache_resource
-def load_faiss_index(): return faiss.read_index('faiss_index.bin')
+def load_faiss_index(): return load_search_index()
 @st.cache_data
 def load_data(): return pd.read_parquet('processed_data.parquet')
+@st.cache_resource
+def load_result_cache(): return SearchResultCache()
+@st.cache_resource
+def load_search_client(): return EmbeddingClient()
 
-model, index, df = load_model(), load_faiss_index(), load_data()
+if SEARCH_BACKEND == "service":
+    search_client, df = load_search_client(), load_data()
+else:
+    model, index, df = load_model(), load_faiss_index(), load_data()
+result_cache = load_result_cache()
 
 # Preprocessing & API Functions
 lemmatizer = WordNetLemmatizer()
@@ -62,16 +73,26 @@ def get_top_so_answer(question_id):
         return f"Could not fetch answers. Error: {e}"
 
 # Hybrid Search
-def find_similar_questions(query, top_k=5, user_tags=None):
-    processed_query = preprocess_text(query)
+def search_embeddings(processed_query, search_k):
+    if SEARCH_BACKEND == "service":
+        return search_client.search(processed_query, search_k)
     query_embedding = model.encode([processed_query])
     faiss.normalize_L2(query_embedding)
+    return index.search(query_embedding.astype(np.float32), search_k)
+
+SCORE_COLUMNS = ['Similarity', 'is_exact_match', 'PersonalizationScore', 'CombinedScore']
+
+def rank_similar_questions(query, top_k=5, user_tags=None):
+    processed_query = preprocess_text(query)
     search_k = min(len(df), top_k * 20)
-    distances, indices = index.search(query_embedding.astype(np.float32), search_k)
+    distances, indices = search_embeddings(processed_query, search_k)
     semantic_results_df = df.iloc[indices[0]].copy()
     semantic_results_df['Similarity'] = distances[0]
     semantic_results_df['is_exact_match'] = False
-    exact_match_df = df[df['Title'].str.lower() == query.lower()].copy()
+    semantic_results_df['RowPosition'] = indices[0]
+    exact_match_mask = (df['Title'].str.lower() == query.lower()).to_numpy()
+    exact_match_df = df[exact_match_mask].copy()
+    exact_match_df['RowPosition'] = np.flatnonzero(exact_match_mask)
     if not exact_match_df.empty:
         exact_match_df['Similarity'] = 1.0
         exact_match_df['is_exact_match'] = True
@@ -82,6 +103,23 @@ def find_similar_questions(query, top_k=5, user_tags=None):
     final_results.loc[final_results['is_exact_match'], 'CombinedScore'] = 1.0
     return final_results.sort_values(by='CombinedScore', ascending=False).head(top_k)
 
+def find_similar_questions(query, top_k=5, user_tags=None):
+    # Reruns and repeated queries are served from the process-wide cache,
+    # which only keeps the ranked row positions and their scores
+    key = make_cache_key(query, user_tags, top_k)
+    version = get_index_version()
+    cached = result_cache.get(key, version)
+    if cached is None:
+        results = rank_similar_questions(query, top_k=top_k, user_tags=user_tags)
+        cached = {'positions': results['RowPosition'].tolist()}
+        for column in SCORE_COLUMNS:
+            cached[column] = results[column].tolist()
+        result_cache.put(key, version, cached)
+    results = df.iloc[cached['positions']].copy()
+    for column in SCORE_COLUMNS:
+        results[column] = cached[column]
+    return results
+
 # UI
 st.title("🔎 Find Real Stack Overflow Solutions")
 st.markdown("Describe your problem to find the best existing questions and their top-rated answers.")
@@ -89,7 +127,11 @@ query = st.text_input("**Enter your question or problem description**", placehol
 
 if query:
     user_tags = st.session_state.get("user_tags", [])
-    recommendations = find_similar_questions(query, top_k=5, user_tags=user_tags)
+    try:
+        recommendations = find_similar_questions(query, top_k=5, user_tags=user_tags)
+    except ConnectionError as e:
+        st.error(f"The search service is not reachable. Error: {e}")
+        st.stop()
 
     if not recommendations.empty:
         top_result_id = recommendations.iloc[0]['Id']
@@ -6,6 +6,7 @@ import pandas as pd
 
 # Import our database function
 from db_functions import save_user_data
+from question_lookup import QuestionLookup
 
 st.set_page_config(page_title="My Profile", page_icon="👤", layout="wide")
 
@@ -21,7 +22,13 @@ def load_data():
     return pd.read_parquet("processed_data.parquet")
 
 
+@st.cache_resource
+def load_question_lookup():
+    return QuestionLookup(load_data()["Id"])
+
+
 df = load_data()
+lookup = load_question_lookup()
 
 # --- UI and Logic ---
 st.title(f"👤 Profile & Settings for {st.session_state.display_name}")
@@ -79,7 +86,7 @@ with st.container(border=True):
         )
     else:
         st.write("Here are the questions you've saved for future reference.")
-        saved_questions_df = df[df["Id"].isin(saved_ids)]
+        saved_questions_df = df.iloc[lookup.positions(saved_ids)]
 
         for _, row in saved_questions_df.iterrows():
             question_id = row["Id"]
@@ -7,6 +7,7 @@ from collections import Counter
 import requests
 import numpy as np
 import re
+from question_lookup import QuestionLookup
 
 st.set_page_config(page_title="Recommendations", page_icon="💡", layout="wide")
 
@@ -22,7 +23,13 @@ def load_data():
     return pd.read_parquet("processed_data.parquet")
 
 
+@st.cache_resource
+def load_question_lookup():
+    return QuestionLookup(load_data()["Id"])
+
+
 df = load_data()
+lookup = load_question_lookup()
 
 
 @st.cache_data(show_spinner="Fetching best answer from Stack Overflow...", ttl=3600)
@@ -65,12 +72,21 @@ def get_user_topic_ranking(history_df):
     return [tag for tag, count in ranked_tags][:7]
 
 
-def get_recommendations_for_tag(tag, history_df, num_recs=5):
+def get_seen_mask(search_history_ids):
+    """Returns the boolean mask of seen questions, reused until the history or corpus changes."""
+    history_key = (id(lookup), lookup.size, tuple(search_history_ids))
+    cached = st.session_state.get("seen_mask")
+    if cached is None or cached[0] != history_key:
+        cached = (history_key, lookup.mask(search_history_ids))
+        st.session_state.seen_mask = cached
+    return cached[1]
+
+
+def get_recommendations_for_tag(tag, seen_mask, num_recs=5):
     """Gets progressive learning recommendations for a specific tag."""
     escaped_tag = r"\b" + re.escape(tag) + r"\b"
-    tag_questions = df[df["CleanTags"].str.contains(escaped_tag, regex=True, na=False)]
-    seen_ids = history_df["Id"].tolist()
-    unseen_questions = tag_questions[~tag_questions["Id"].isin(seen_ids)].copy()
+    tag_mask = df["CleanTags"].str.contains(escaped_tag, regex=True, na=False)
+    unseen_questions = df[tag_mask.to_numpy() & ~seen_mask].copy()
     if unseen_questions.empty:
         return pd.DataFrame()
     unseen_questions.loc[:, "title_length"] = unseen_questions["Title"].str.len()
@@ -80,7 +96,7 @@ def get_recommendations_for_tag(tag, history_df, num_recs=5):
 
 
 # --- NEW: Master "All" Recommendation Logic ---
-def get_all_recommendations(history_df, profile_tags, num_recs=10):
+def get_all_recommendations(history_df, seen_mask, profile_tags, num_recs=10):
     """Generates a master list of recommendations based on all factors."""
     if history_df.empty:
         return pd.DataFrame()
@@ -91,14 +107,13 @@ def get_all_recommendations(history_df, profile_tags, num_recs=10):
         topic: len(ranked_topics) - i for i, topic in enumerate(ranked_topics)
     }
 
-    # 2. Filter out questions already seen in search history
-    seen_ids = history_df["Id"].tolist()
-    unseen_questions = df[~df["Id"].isin(seen_ids)].copy()
+    # 2. Keep only the positions of questions not seen in search history
+    unseen_positions = np.flatnonzero(~seen_mask)
 
     # 3. Define a function to calculate a relevance score for each question
-    def calculate_relevance(row):
+    def calculate_relevance(clean_tags):
         score = 0
-        tags = set(row["CleanTags"].split())
+        tags = set(clean_tags.split())
         # Add points based on recent search activity
         for tag in tags:
             score += topic_scores.get(tag, 0)
@@ -107,14 +122,16 @@ def get_all_recommendations(history_df, profile_tags, num_recs=10):
             score += 2  # Bonus points for profile match
         return score
 
-    # 4. Calculate scores and add a difficulty metric
-    unseen_questions["relevance"] = unseen_questions.apply(calculate_relevance, axis=1)
-    unseen_questions["title_length"] = unseen_questions["Title"].str.len()
+    # 4. Calculate scores and a difficulty metric without copying the corpus
+    relevance = df["CleanTags"].map(calculate_relevance).to_numpy()[unseen_positions]
+    title_length = df["Title"].str.len().to_numpy()[unseen_positions]
 
     # 5. Sort by relevance, then by difficulty as a tie-breaker
-    return unseen_questions.sort_values(
-        by=["relevance", "title_length"], ascending=[False, True]
-    ).head(num_recs)
+    order = np.lexsort((title_length, -relevance))[:num_recs]
+    recommendations = df.iloc[unseen_positions[order]].copy()
+    recommendations["relevance"] = relevance[order]
+    recommendations["title_length"] = title_length[order]
+    return recommendations
 
 
 # --- UI ---
@@ -125,7 +142,7 @@ st.markdown(
 
 search_history_ids = st.session_state.get("search_history", [])
 profile_tags = st.session_state.get("user_tags", [])
-history_df = df[df["Id"].isin(search_history_ids)]
+history_df = df.iloc[lookup.positions(search_history_ids)]
 
 if not search_history_ids:
     st.info(
@@ -133,6 +150,7 @@ if not search_history_ids:
     )
     st.stop()
 
+seen_mask = get_seen_mask(search_history_ids)
 ranked_topics = get_user_topic_ranking(history_df)
 # Prepend "All" to the list of topics
 display_topics = ["All"] + ranked_topics
@@ -149,10 +167,10 @@ selected_topic = st.radio(
 
 if selected_topic == "All":
     st.subheader("Top Recommendations For You")
-    recommendations = get_all_recommendations(history_df, profile_tags)
+    recommendations = get_all_recommendations(history_df, seen_mask, profile_tags)
 else:
     st.subheader(f"Next Steps for `{selected_topic}`")
-    recommendations = get_recommendations_for_tag(selected_topic, history_df)
+    recommendations = get_recommendations_for_tag(selected_topic, seen_mask)
 
 if not recommendations.empty:
     for _, row in recommendations.iterrows():
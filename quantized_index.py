@@ -0,0 +1,123 @@
+import argparse
+import os
+import time
+
+import faiss
+import numpy as np
+
+FLAT_INDEX_FILE = "faiss_index.bin"
+QUANTIZED_INDEX_FILE = "faiss_index_quantized.bin"
+EMBEDDINGS_FILE = "embeddings_f32.npy"
+
+# "flat" keeps the original float32 index, "quantized" searches the compact
+# index and re-ranks the shortlist against the memory-mapped float32 vectors
+INDEX_MODE = os.environ.get("SO_HUB_INDEX_MODE", "flat")
+RERANK_FACTOR = 4
+
+
+def build_quantized_index(flat_path=FLAT_INDEX_FILE, quantizer="sq8"):
+    """Builds the compact index and the float32 re-rank matrix from the flat index."""
+    flat_index = faiss.read_index(flat_path)
+    embeddings = flat_index.reconstruct_n(0, flat_index.ntotal).astype(np.float32)
+    np.save(EMBEDDINGS_FILE, embeddings)
+
+    dim, metric = flat_index.d, flat_index.metric_type
+    if quantizer == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, metric)
+    elif quantizer == "fp16":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, metric)
+    elif quantizer == "pq":
+        # 384-dim MiniLM vectors split into 48 sub-vectors of 8 dims each
+        index = faiss.IndexPQ(dim, 48, 8, metric)
+    else:
+        raise ValueError(f"Unknown quantizer: {quantizer}")
+    index.train(embeddings)
+    index.add(embeddings)
+    faiss.write_index(index, QUANTIZED_INDEX_FILE)
+    return index
+
+
+class RerankedIndex:
+    """A compact first-pass index followed by exact float32 re-ranking.
+
+    Exposes the same search() signature as a FAISS index so the search page
+    can use either one interchangeably.
+    """
+
+    def __init__(self, index, embeddings, rerank_factor=RERANK_FACTOR):
+        self.index = index
+        self.embeddings = embeddings
+        self.rerank_factor = rerank_factor
+        self.ntotal = index.ntotal
+        self.metric_type = index.metric_type
+
+    def search(self, queries, k):
+        shortlist_k = min(self.ntotal, k * self.rerank_factor)
+        _, candidates = self.index.search(queries, shortlist_k)
+        distances = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            ids = np.sort(ids[ids >= 0])
+            # Sorted ids keep reads from the memory map sequential
+            vectors = np.asarray(self.embeddings[ids], dtype=np.float32)
+            if self.metric_type == faiss.METRIC_INNER_PRODUCT:
+                scores = vectors @ query
+            else:
+                scores = -((vectors - query) ** 2).sum(axis=1)
+            order = np.argsort(-scores)[:k]
+            distances[row, : len(order)] = scores[order]
+            indices[row, : len(order)] = ids[order]
+        if self.metric_type != faiss.METRIC_INNER_PRODUCT:
+            distances = -distances
+        return distances, indices
+
+
+def load_search_index(mode=INDEX_MODE):
+    """Loads the flat index, or the quantized index wrapped with exact re-ranking."""
+    if mode == "quantized":
+        index = faiss.read_index(QUANTIZED_INDEX_FILE)
+        embeddings = np.load(EMBEDDINGS_FILE, mmap_mode="r")
+        return RerankedIndex(index, embeddings)
+    return faiss.read_index(FLAT_INDEX_FILE)
+
+
+def benchmark(num_queries=1000, k=10):
+    """Compares recall@k, latency and memory of the re-ranked index against the flat one."""
+    flat_index = faiss.read_index(FLAT_INDEX_FILE)
+    compact_index = faiss.read_index(QUANTIZED_INDEX_FILE)
+    reranked_index = load_search_index("quantized")
+
+    # Corpus vectors with a little noise stand in for unseen user queries
+    rng = np.random.default_rng(0)
+    sample_ids = rng.choice(flat_index.ntotal, size=min(num_queries, flat_index.ntotal), replace=False)
+    queries = np.load(EMBEDDINGS_FILE, mmap_mode="r")[np.sort(sample_ids)]
+    queries += rng.normal(scale=0.05, size=queries.shape).astype(np.float32)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+    faiss.normalize_L2(queries)
+
+    results = {}
+    for name, index in [("flat", flat_index), ("quantized", compact_index), ("quantized+rerank", reranked_index)]:
+        start = time.perf_counter()
+        _, ids = index.search(queries, k)
+        elapsed = time.perf_counter() - start
+        results[name] = (ids, elapsed / len(queries) * 1000)
+
+    truth = results["flat"][0]
+    print(f"{'index':<18}{'recall@' + str(k):>10}{'ms/query':>10}{'memory MB':>11}")
+    for name, (ids, latency_ms) in results.items():
+        recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(ids, truth)])
+        source = flat_index if name == "flat" else compact_index
+        memory_mb = faiss.serialize_index(source).nbytes / 1e6
+        print(f"{name:<18}{recall:>10.3f}{latency_ms:>10.3f}{memory_mb:>11.1f}")
+    print(f"float32 re-rank matrix on disk (memory-mapped): {os.path.getsize(EMBEDDINGS_FILE) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or benchmark the quantized FAISS index.")
+    parser.add_argument("command", choices=["build", "benchmark"])
+    parser.add_argument("--quantizer", choices=["sq8", "fp16", "pq"], default="sq8")
+    args = parser.parse_args()
+    if args.command == "build":
+        build_quantized_index(quantizer=args.quantizer)
+    else:
+        benchmark()
@@ -0,0 +1,32 @@
+import numpy as np
+
+
+class QuestionLookup:
+    """Maps question Ids to row positions of the dataset with a sorted Id array.
+
+    Looking up k Ids costs O(k log n) via searchsorted instead of an isin()
+    scan over the whole frame.
+    """
+
+    def __init__(self, ids):
+        ids = np.asarray(ids)
+        self.size = len(ids)
+        self.order = np.argsort(ids, kind="stable")
+        self.sorted_ids = ids[self.order]
+
+    def positions(self, question_ids):
+        """Returns the sorted, de-duplicated row positions of the known Ids."""
+        question_ids = np.asarray(question_ids, dtype=self.sorted_ids.dtype)
+        if self.size == 0 or question_ids.size == 0:
+            return np.array([], dtype=np.intp)
+        found = np.searchsorted(self.sorted_ids, question_ids)
+        found = np.minimum(found, self.size - 1)
+        found = found[self.sorted_ids[found] == question_ids]
+        # Same row order as df[df["Id"].isin(question_ids)]
+        return np.unique(self.order[found])
+
+    def mask(self, question_ids):
+        """Returns a boolean mask over the dataset rows that is True for the given Ids."""
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.positions(question_ids)] = True
+        return mask
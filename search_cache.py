@@ -0,0 +1,65 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Files whose modification invalidates every cached search result
+INDEX_FILES = [
+    "faiss_index.bin",
+    "faiss_index_quantized.bin",
+    "embeddings_f32.npy",
+    "processed_data.parquet",
+]
+MAX_CACHED_QUERIES = 2048
+
+
+def get_index_version(paths=INDEX_FILES):
+    """Builds a version stamp from the size and mtime of the index/data files."""
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            version.append((path, None, None))
+    return tuple(version)
+
+
+def make_cache_key(query, user_tags, top_k):
+    """Normalizes a query and the user's tag set into a hashable cache key."""
+    return (query.lower(), frozenset(user_tags or []), top_k)
+
+
+class SearchResultCache:
+    """A thread-safe, size-bounded LRU cache of ranked search results.
+
+    The cache is shared by every Streamlit session in the process, so all
+    access goes through a lock. Entries are dropped wholesale whenever the
+    index version changes.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_QUERIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+                return None
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, version, result):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)